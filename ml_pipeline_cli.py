@@ -6,127 +6,505 @@ A command-line tool for managing datasets and models with Roboflow and SharePoin
 """
 
 import argparse
+import asyncio
+import contextlib
 import sys
 import logging
-from roboflow import Roboflow
 from pathlib import Path
 import os
 import getpass
+import functools
 import json
+import time
+import random
+import threading
+import atexit
+import queue
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from logging.handlers import QueueHandler, QueueListener
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Import RoboflowUploader from roboflow_uploader.py (move the class definition here in the next step)
 # from roboflow_uploader import RoboflowUploader
 
-# Configure logging
+# Configure logging. Records are formatted by the QueueHandler and written
+# by a single listener thread, so upload workers never block on file I/O.
+_log_queue = queue.Queue(-1)
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('ml_pipeline_cli.log'),
-        logging.StreamHandler(sys.stdout)
-    ]
+    handlers=[QueueHandler(_log_queue)]
+)
+_log_listener = QueueListener(
+    _log_queue,
+    logging.FileHandler('ml_pipeline_cli.log'),
+    logging.StreamHandler(sys.stdout)
 )
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logger = logging.getLogger(__name__)
 
 CONFIG_PATH = Path.home() / ".ml_pipeline_cli" / "config.json"
+ROBOFLOW_UPLOAD_URL = "https://api.roboflow.com/dataset/{project}/upload"
+ROBOFLOW_BATCH_NAME = "Pip Package Upload"  # the roboflow SDK's default upload batch
+_JPEG_EXTS = frozenset({".jpg", ".jpeg"})
+PROJECT_CACHE_TTL = 3600  # seconds; override with "project_cache_ttl" in the config
+_DEFAULT_EXTS = frozenset({".jpg", ".jpeg", ".png", ".bmp", ".tiff"})
+UPLOAD_TIMEOUT = (10, 300)  # (connect, read) seconds
+_RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+_UNRECOVERABLE_STATUS = frozenset({401, 403, 404})
 
 
-def save_config(api_key, project=None, workspace=None):
+class UnrecoverableError(Exception):
+    """Upload failure that retrying cannot fix, e.g. bad API key or unknown project."""
+
+
+def _write_config(config):
+    # Write a private temp file and rename it into place, so concurrent CLI
+    # runs never see a truncated config and the API key is never world-readable
     config_dir = CONFIG_PATH.parent
     config_dir.mkdir(parents=True, exist_ok=True)
+    tmp_path = CONFIG_PATH.with_name(f"{CONFIG_PATH.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    payload = json.dumps(config).encode()
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    try:
+        try:
+            view = memoryview(payload)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, CONFIG_PATH)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def save_config(api_key, project=None, workspace=None):
     config = {"api_key": api_key}
     if project:
         config["project"] = project
     if workspace:
         config["workspace"] = workspace
-    with open(CONFIG_PATH, "w") as f:
-        json.dump(config, f)
-    os.chmod(CONFIG_PATH, 0o600)
+    _write_config(config)
 
 
 def load_config():
-    if CONFIG_PATH.exists():
+    try:
         with open(CONFIG_PATH, "r") as f:
             return json.load(f)
-    return {}
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable config %s: %s", CONFIG_PATH, e)
+        return {}
+
+
+def _fetch_project(api_key, workspace, project):
+    # The project endpoint returns the versions alongside the project, but
+    # Workspace.project() discards them; build the Project from one response
+    from roboflow.adapters import rfapi
+    from roboflow.core.project import Project
+    result = rfapi.get_project(api_key, workspace, project)
+    versions = [int(str(v["id"]).rsplit("/", 1)[-1]) for v in result.get("versions", [])]
+    return Project(api_key, result["project"]), (max(versions) if versions else None)
+
+
+def _get_project(api_key, workspace, project, refresh=False):
+    """
+    Return (info, project) for a Roboflow project. info comes from the
+    on-disk project cache when it is younger than the configured TTL, in
+    which case project is None and no Roboflow request is made. Pass
+    refresh=True to bypass the cache and re-resolve it.
+    """
+    config = load_config()
+    key = f"{workspace}/{project}"
+    ttl = config.get("project_cache_ttl", PROJECT_CACHE_TTL)
+    cached = config.get("project_cache", {}).get(key)
+    if cached and not refresh and time.time() - cached.get("cached_at", 0) < ttl:
+        return cached, None
+    proj, latest = _fetch_project(api_key, workspace, project)
+    info = {
+        "name": proj.name,
+        "type": proj.type,
+        "version": latest,
+        "cached_at": time.time()
+    }
+    config.setdefault("project_cache", {})[key] = info
+    try:
+        _write_config(config)
+    except OSError as e:
+        logger.warning("Could not write project cache: %s", e)
+    return info, proj
+
+
+def _backoff_delay(attempt, base_delay=1.0, max_delay=30.0, jitter=0.5):
+    # Capped exponential backoff with multiplicative jitter
+    return min(max_delay, base_delay * 2 ** attempt) * (1 + random.uniform(0, jitter))
+
+
+def _retry_after(response):
+    """Seconds to wait according to a Retry-After header, or None."""
+    value = response.headers.get("Retry-After") if response is not None else None
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def _check_upload_result(result):
+    if not (result.get("success") or result.get("duplicate")):
+        raise RuntimeError(result.get("error") or result)
+    return result
+
+
+def _write_json(path, obj):
+    # orjson when available; a single fd-level write either way
+    if orjson is not None:
+        payload = orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    else:
+        payload = json.dumps(obj, indent=2).encode()
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(payload)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+def _prefetch_images(image_paths, workers=4, depth=8):
+    """
+    Yield (path, decoded image) in order, decoding up to depth images ahead
+    on a thread pool so disk reads and decoding overlap with inference.
+    """
+    import cv2
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for image_path in image_paths:
+            pending.append((image_path, executor.submit(cv2.imread, image_path)))
+            if len(pending) >= depth:
+                path, future = pending.popleft()
+                yield path, future.result()
+        while pending:
+            path, future = pending.popleft()
+            yield path, future.result()
+
+
+def find_image_files(image_dir, file_extensions=_DEFAULT_EXTS):
+    # Single directory pass; DirEntry.is_file() reuses the d_type from readdir
+    if file_extensions is _DEFAULT_EXTS:
+        exts = _DEFAULT_EXTS
+    else:
+        exts = frozenset("." + e.lower().lstrip(".") for e in file_extensions)
+    with os.scandir(image_dir) as it:
+        return [entry.path for entry in it
+                if entry.is_file(follow_symlinks=False)
+                and os.path.splitext(entry.name)[1].lower() in exts]
+
+
+class SlidingWindowLimiter:
+    """
+    Client-side rate limiter allowing at most rpm requests in any sliding
+    window of `window` seconds, shared across threads. With rpm=None only
+    the pauses requested through pause()/observe() apply.
+    """
+    def __init__(self, rpm: int = None, window: float = 60.0):
+        self.rpm = rpm
+        self.window = window
+        self._timestamps = deque()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+    def wait_if_throttled(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                delay = self._paused_until - now
+                if delay <= 0 and self.rpm:
+                    while self._timestamps and now - self._timestamps[0] >= self.window:
+                        self._timestamps.popleft()
+                    if len(self._timestamps) >= self.rpm:
+                        delay = self._timestamps[0] + self.window - now
+                if delay <= 0:
+                    if self.rpm:
+                        self._timestamps.append(now)
+                    return
+            time.sleep(delay)
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+    def observe(self, response):
+        # Slow down before the server starts rejecting: pause once fewer
+        # than 10% of the advertised requests remain
+        try:
+            remaining = int(response.headers["x-ratelimit-remaining-requests"])
+            limit = int(response.headers["x-ratelimit-limit-requests"])
+        except (KeyError, ValueError):
+            return
+        if remaining < 0.1 * limit:
+            delay = _retry_after(response)
+            self.pause(1.0 if delay is None else delay)
+
+
+class AIMDConcurrencyController:
+    """
+    Additive-increase/multiplicative-decrease limit on concurrent uploads.
+    The limit grows by alpha while the mean latency of the last `window`
+    uploads stays within target_latency, and is multiplied by beta on
+    congestion (429, 5xx, timeouts). Anything between c_min and c_max.
+    A burst of failures from requests already in flight at the last
+    decrease counts as one congestion event, not one per request.
+    """
+    def __init__(self, c_min: int = 1, c_max: int = 32, target_latency: float = 2.0,
+                 alpha: float = 0.5, beta: float = 0.5, window: int = 20):
+        self.c_min = c_min
+        self.c_max = c_max
+        self.target_latency = target_latency
+        self.alpha = alpha
+        self.beta = beta
+        self.limit = float(min(c_max, max(c_min, 4)))
+        self._in_flight = 0
+        self._latencies = deque(maxlen=window)
+        self._last_decrease = float("-inf")
+        self._cond = threading.Condition()
+    def acquire(self):
+        with self._cond:
+            while self._in_flight >= int(self.limit):
+                self._cond.wait()
+            self._in_flight += 1
+    def release(self, latency: float):
+        with self._cond:
+            self._in_flight -= 1
+            self._latencies.append(latency)
+            if sum(self._latencies) / len(self._latencies) <= self.target_latency:
+                self.limit = min(self.c_max, self.limit + self.alpha)
+            self._cond.notify_all()
+    def on_congestion(self, sent_at: float):
+        # sent_at is the time.monotonic() at which the failed request was sent
+        with self._cond:
+            if sent_at <= self._last_decrease:
+                return
+            self._last_decrease = time.monotonic()
+            self.limit = max(self.c_min, self.limit * self.beta)
+            # Latencies measured at the old limit no longer say anything
+            self._latencies.clear()
 
 # --- RoboflowUploader class (moved from roboflow_uploader.py) ---
 class RoboflowUploader:
     # ... existing code from roboflow_uploader.py ...
-    def __init__(self, api_key: str, project_name: str, workspace_name: str):
+    _session = None  # shared requests.Session, see _http_session()
+    _session_lock = threading.Lock()
+    @classmethod
+    def _http_session(cls):
+        # One keep-alive pool for every uploader instance, so uploads reuse
+        # TCP/TLS connections instead of handshaking each time
+        if cls._session is None:
+            with cls._session_lock:
+                if cls._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    from urllib3.util.retry import Retry
+                    session = requests.Session()
+                    # POST is not in Retry's allowed methods, so only connection
+                    # failures are retried here - before any of the streamed
+                    # body has been sent. _raw_upload retries the rest.
+                    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32,
+                                          max_retries=Retry(total=3, backoff_factor=0.3))
+                    session.mount("https://", adapter)
+                    cls._session = session
+        return cls._session
+    def __init__(self, api_key: str, project_name: str, workspace_name: str, requests_per_minute: int = None,
+                 max_concurrency: int = 32):
         self.api_key = api_key
         self.project_name = project_name
         self.workspace_name = workspace_name
+        self._upload_url = ROBOFLOW_UPLOAD_URL.format(project=project_name)
+        self._executor = None
+        # Shared by every upload thread of this uploader
+        self._limiter = SlidingWindowLimiter(requests_per_minute)
+        self._concurrency = AIMDConcurrencyController(c_max=max_concurrency)
         try:
-            self.rf = Roboflow(api_key=api_key)
-            self.project = self.rf.workspace(workspace_name).project(project_name)
-            logger.info(f"Successfully connected to project: {project_name}")
+            self._info, self._project = _get_project(api_key, workspace_name, project_name)
+            if self._project is None:
+                logger.info("Using cached metadata for project: %s", project_name)
+            else:
+                logger.info("Successfully connected to project: %s", project_name)
         except Exception as e:
-            logger.error(f"Failed to initialize Roboflow connection: {e}")
+            logger.error("Failed to initialize Roboflow connection: %s", e)
             raise
+    @property
+    def project(self):
+        # Only resolved when the SDK is actually needed (cache hits skip it)
+        if self._project is None:
+            from roboflow import Roboflow
+            self._project = Roboflow(api_key=self.api_key).workspace(self.workspace_name).project(self.project_name)
+        return self._project
     def upload_single_photo(self, image_path: str, split: str = "train") -> bool:
+        if not os.path.exists(image_path):
+            logger.error("Image file not found: %s", image_path)
+            return False
+        return self._upload_no_check(image_path, split)
+    def _upload_no_check(self, image_path: str, split: str) -> bool:
+        # Batch paths come from a directory scan, so skip the existence stat
         try:
-            if not os.path.exists(image_path):
-                logger.error(f"Image file not found: {image_path}")
-                return False
-            filename = Path(image_path).stem
-            logger.info(f"Uploading {image_path} to {split} split...")
-            self.project.upload(
-                image_path=image_path,
-                num_retry_uploads=3,
-                split=split
-            )
-            logger.info(f"Successfully uploaded {filename} to {split} split")
+            filename = os.path.splitext(os.path.basename(image_path))[0]
+            logger.info("Uploading %s to %s split...", image_path, split)
+            self._raw_upload(image_path, split)
+            logger.info("Successfully uploaded %s to %s split", filename, split)
             return True
+        except FileNotFoundError:
+            logger.error("Image file not found: %s", image_path)
+            return False
         except Exception as e:
-            logger.error(f"Failed to upload {image_path}: {e}")
+            logger.error("Failed to upload %s: %s", image_path, e)
             return False
-    def upload_batch_photos(self, image_dir: str, split: str = "train", file_extensions=None) -> dict:
+    def _raw_upload(self, image_path: str, split: str, max_retries: int = 3, base_delay: float = 1.0,
+                    max_delay: float = 30.0, jitter: float = 0.5) -> dict:
+        import requests
+        from requests_toolbelt.multipart.encoder import MultipartEncoder
+        filename = os.path.basename(image_path)
+        jpeg_bytes = None
+        if os.path.splitext(filename)[1].lower() not in _JPEG_EXTS:
+            # project.upload sent everything as JPEG; convert the same way, once
+            from roboflow.util.image_utils import file2jpeg
+            jpeg_bytes = file2jpeg(image_path)
+        for attempt in range(max_retries + 1):
+            try:
+                source = open(image_path, "rb") if jpeg_bytes is None else contextlib.nullcontext(jpeg_bytes)
+                with source as f:
+                    # JPEGs are streamed from the file object in chunks rather
+                    # than read into memory first
+                    encoder = MultipartEncoder(fields={"name": filename, "file": (filename, f, "image/jpeg")})
+                    self._limiter.wait_if_throttled()
+                    sent_at = time.monotonic()
+                    response = self._http_session().post(
+                        self._upload_url,
+                        params={"api_key": self.api_key, "name": filename, "split": split, "batch": ROBOFLOW_BATCH_NAME},
+                        data=encoder,
+                        headers={"Content-Type": encoder.content_type},
+                        timeout=UPLOAD_TIMEOUT
+                    )
+                response.raise_for_status()
+                self._limiter.observe(response)
+                return _check_upload_result(response.json())
+            except requests.RequestException as e:
+                status = e.response.status_code if e.response is not None else None
+                if status in _UNRECOVERABLE_STATUS:
+                    raise UnrecoverableError(f"Roboflow rejected {filename} ({status}): {e}") from e
+                if status is None or status in _RETRYABLE_STATUS:
+                    # 429, 5xx, timeouts and connection errors all mean back off
+                    self._concurrency.on_congestion(sent_at)
+                if attempt == max_retries or (status is not None and status not in _RETRYABLE_STATUS):
+                    raise
+                delay = _retry_after(e.response)
+                if delay is None:
+                    delay = _backoff_delay(attempt, base_delay, max_delay, jitter)
+                if status == 429:
+                    # Hold back the other workers too, not just this one
+                    self._limiter.pause(delay)
+                logger.warning("Upload of %s failed (%s), retrying in %.1fs", filename, e, delay)
+            time.sleep(delay)
+    async def upload_single_photo_async(self, image_path: str, split: str = "train") -> bool:
+        # The upload blocks on the network; run it on a bounded pool so
+        # callers on an event loop stay responsive
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="roboflow-upload")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor,
+            functools.partial(self.upload_single_photo, image_path, split)
+        )
+    def _find_batch_files(self, image_dir: str, file_extensions) -> list:
         if file_extensions is None:
-            file_extensions = ['.jpg', '.jpeg', '.png', '.bmp', '.tiff']
-        if not os.path.exists(image_dir):
-            logger.error(f"Directory not found: {image_dir}")
-            return {"success": 0, "failed": 0, "total": 0}
-        image_files = []
-        for ext in file_extensions:
-            image_files.extend(Path(image_dir).glob(f"*{ext}"))
-            image_files.extend(Path(image_dir).glob(f"*{ext.upper()}"))
+            file_extensions = _DEFAULT_EXTS
+        try:
+            image_files = find_image_files(image_dir, file_extensions)
+        except (FileNotFoundError, NotADirectoryError):
+            logger.error("Directory not found: %s", image_dir)
+            return []
         if not image_files:
-            logger.warning(f"No image files found in {image_dir}")
-            return {"success": 0, "failed": 0, "total": 0}
-        logger.info(f"Found {len(image_files)} images to upload")
-        success_count = 0
-        failed_count = 0
-        for image_file in image_files:
-            if self.upload_single_photo(str(image_file), split):
-                success_count += 1
-            else:
-                failed_count += 1
+            logger.warning("No image files found in %s", image_dir)
+            return []
+        logger.info("Found %s images to upload", len(image_files))
+        return image_files
+    def _batch_stats(self, success_count: int, total: int) -> dict:
+        failed_count = total - success_count
         stats = {
             "success": success_count,
             "failed": failed_count,
-            "total": len(image_files)
+            "total": total
         }
-        logger.info(f"Batch upload completed: {success_count} successful, {failed_count} failed")
+        logger.info("Batch upload completed: %s successful, %s failed", success_count, failed_count)
         return stats
+    async def upload_batch_photos_async(self, image_dir: str, split: str = "train", file_extensions=None, concurrency: int = 32) -> dict:
+        # Same retry, rate limiting and AIMD policy as upload_batch_photos,
+        # just kept off the caller's event loop
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None,
+            functools.partial(self.upload_batch_photos, image_dir, split, file_extensions, concurrency)
+        )
+    def _upload_adaptive(self, image_path: str, split: str) -> bool:
+        self._concurrency.acquire()
+        start = time.monotonic()
+        try:
+            return self._upload_no_check(image_path, split)
+        finally:
+            self._concurrency.release(time.monotonic() - start)
+    def upload_batch_photos(self, image_dir: str, split: str = "train", file_extensions=None, workers: int = None) -> dict:
+        image_files = self._find_batch_files(image_dir, file_extensions)
+        if not image_files:
+            return {"success": 0, "failed": 0, "total": 0}
+        # Uploads are network-bound; the workers share the pooled session.
+        # The pool is only an upper bound - the AIMD controller decides how
+        # many uploads are actually in flight.
+        success_count = 0
+        with ThreadPoolExecutor(max_workers=workers or self._concurrency.c_max, thread_name_prefix="roboflow-batch") as executor:
+            futures = [executor.submit(self._upload_adaptive, image_file, split) for image_file in image_files]
+            for future in as_completed(futures):
+                if future.result():
+                    success_count += 1
+        return self._batch_stats(success_count, len(image_files))
     def get_project_info(self) -> dict:
         try:
             info = {
-                "name": self.project.name,
-                "type": self.project.type,
-                "version": self.project.version,
+                "name": self._info["name"],
+                "type": self._info["type"],
+                "version": self._info["version"],
                 "workspace": self.workspace_name
             }
             return info
         except Exception as e:
-            logger.error(f"Failed to get project info: {e}")
+            logger.error("Failed to get project info: %s", e)
             return {}
 
+
+@functools.lru_cache(maxsize=4)
+def _get_uploader(api_key, project, workspace, requests_per_minute=None, max_concurrency=32):
+    return RoboflowUploader(api_key, project, workspace, requests_per_minute, max_concurrency)
+
 # --- CLI setup ---
-def main():
-    parser = argparse.ArgumentParser(description="ML Pipeline CLI")
-    subparsers = parser.add_subparsers(dest="command", required=True)
+def _positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
 
+def _add_upload_parser(subparsers):
     # Upload subcommand
     upload_parser = subparsers.add_parser("upload", help="Upload images to Roboflow")
     upload_parser.add_argument("--api-key")
@@ -135,15 +513,22 @@ def main():
     upload_parser.add_argument("--image", help="Path to a single image file to upload")
     upload_parser.add_argument("--directory", help="Directory containing images to upload")
     upload_parser.add_argument("--split", default="train", choices=["train", "valid", "test"])
-    upload_parser.add_argument("--extensions", nargs="+", default=[".jpg", ".jpeg", ".png", ".bmp", ".tiff"])
+    upload_parser.add_argument("--extensions", nargs="+", default=_DEFAULT_EXTS, help="Image file extensions to upload (case-insensitive)")
     upload_parser.add_argument("--info", action="store_true", help="Display project information")
+    upload_parser.add_argument("--workers", type=_positive_int, default=32, help="Maximum parallel uploads for --directory; concurrency adapts below this (default: 32)")
+    upload_parser.add_argument("--rpm", type=_positive_int, help="Client-side cap on Roboflow upload requests per minute (default: no cap)")
 
+
+def _add_download_parser(subparsers):
     # Download subcommand
     download_parser = subparsers.add_parser("download", help="Download datasets from Roboflow")
     download_parser.add_argument("--output-dir", default="./data", help="Directory to save the dataset")
     download_parser.add_argument("--format", default="yolov8", help="Dataset format (e.g., yolov8, coco, voc)")
     download_parser.add_argument("--version", type=int, help="Dataset version number (default: latest)")
+    download_parser.add_argument("--refresh", action="store_true", help="Re-resolve the latest version instead of using the cached one")
+
 
+def _add_infer_parser(subparsers):
     # Infer subcommand
     infer_parser = subparsers.add_parser("infer", help="Run model inference on images")
     infer_parser.add_argument("--image", help="Path to a single image file to run inference on")
@@ -151,7 +536,11 @@ def main():
     infer_parser.add_argument("--model-id", help="Roboflow model id (project/version), e.g. my-project/1")
     infer_parser.add_argument("--confidence", type=float, default=0.4, help="Confidence threshold (0-1, default: 0.4)")
     infer_parser.add_argument("--output-dir", default="./inference_results", help="Directory to save inference results as JSON")
+    infer_parser.add_argument("--refresh", action="store_true", help="Re-resolve the latest version instead of using the cached one")
+    infer_parser.add_argument("--batch-size", type=_positive_int, default=16, help="Images per model.infer call for --directory (default: 16)")
 
+
+def _add_sync_parser(subparsers):
     # Sync subcommand
     sync_parser = subparsers.add_parser("sync", help="Sync local folders with SharePoint and Roboflow")
     sync_parser.add_argument("--sharepoint-site", help="SharePoint site URL")
@@ -163,6 +552,8 @@ def main():
     sync_parser.add_argument("--username", help="SharePoint username (optional)")
     sync_parser.add_argument("--password", help="SharePoint password (optional)")
 
+
+def _add_sync_all_parser(subparsers):
     # Sync-all subcommand
     sync_all_parser = subparsers.add_parser("sync-all", help="Sync local dataset folders (train/valid/test) with both SharePoint and Roboflow")
     sync_all_parser.add_argument("--local-root", required=True, help="Local root folder containing train/valid/test folders")
@@ -175,25 +566,62 @@ def main():
     sync_all_parser.add_argument("--client-secret", help="Azure AD App client secret (optional)")
     sync_all_parser.add_argument("--username", help="SharePoint username (optional)")
     sync_all_parser.add_argument("--password", help="SharePoint password (optional)")
+    sync_all_parser.add_argument("--workers", type=_positive_int, default=32, help="Maximum parallel Roboflow uploads; concurrency adapts below this (default: 32)")
+    sync_all_parser.add_argument("--rpm", type=_positive_int, help="Client-side cap on Roboflow upload requests per minute (default: no cap)")
+
 
+def _add_login_parser(subparsers):
     # Login subcommand
     login_parser = subparsers.add_parser("login", help="Authenticate with Roboflow and store API key")
     login_parser.add_argument("--api-key", help="Roboflow API key (if not provided, will prompt)")
     login_parser.add_argument("--project", help="Default project name (optional)")
     login_parser.add_argument("--workspace", help="Default workspace name (optional)")
 
+
+def _add_train_parser(subparsers):
     # Train subcommand (placeholder)
-    train_parser = subparsers.add_parser("train", help="Train a model on a dataset")
+    subparsers.add_parser("train", help="Train a model on a dataset")
     # TODO: Add arguments
 
+
+def _add_video_infer_parser(subparsers):
     # Video-infer subcommand (placeholder)
-    video_infer_parser = subparsers.add_parser("video-infer", help="Run model on video stream from camera")
+    subparsers.add_parser("video-infer", help="Run model on video stream from camera")
     # TODO: Add arguments
 
+
+def _add_video_capture_parser(subparsers):
     # Video-capture subcommand (placeholder)
-    video_capture_parser = subparsers.add_parser("video-capture", help="Capture video from camera to dataset folder")
+    subparsers.add_parser("video-capture", help="Capture video from camera to dataset folder")
     # TODO: Add arguments
 
+
+_SUBPARSERS = {
+    "upload": _add_upload_parser,
+    "download": _add_download_parser,
+    "infer": _add_infer_parser,
+    "sync": _add_sync_parser,
+    "sync-all": _add_sync_all_parser,
+    "login": _add_login_parser,
+    "train": _add_train_parser,
+    "video-infer": _add_video_infer_parser,
+    "video-capture": _add_video_capture_parser,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ML Pipeline CLI")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    # Only register the subcommand being run; build them all for --help or
+    # an unknown command so argparse can list the choices
+    command = sys.argv[1] if len(sys.argv) > 1 else None
+    if command in _SUBPARSERS:
+        _SUBPARSERS[command](subparsers)
+    else:
+        for add_parser in _SUBPARSERS.values():
+            add_parser(subparsers)
+
     args = parser.parse_args()
 
     if args.command == "login":
@@ -207,7 +635,7 @@ def main():
     # Load config for other commands
     config = load_config()
     api_key = (
-        args.api_key or
+        getattr(args, "api_key", None) or
         os.environ.get("ROBOFLOW_API_KEY") or
         config.get("api_key")
     )
@@ -226,7 +654,7 @@ def main():
         if not api_key or not project or not workspace:
             print("API key, project, and workspace are required. Use the 'login' command or provide them via arguments or environment variables.")
             sys.exit(1)
-        uploader = RoboflowUploader(api_key, project, workspace)
+        uploader = _get_uploader(api_key, project, workspace, args.rpm, args.workers)
         if args.info:
             info = uploader.get_project_info()
             print("\nProject Information:")
@@ -234,6 +662,7 @@ def main():
                 print(f"  {key}: {value}")
             print()
         if args.image:
+            # upload_single_photo validates the path and logs a missing file
             success = uploader.upload_single_photo(args.image, args.split)
             if success:
                 print(f"Successfully uploaded {args.image}")
@@ -256,12 +685,16 @@ def main():
             print("API key, project, and workspace are required. Use the 'login' command or provide them via arguments or environment variables.")
             sys.exit(1)
         try:
-            rf = Roboflow(api_key=api_key)
-            proj = rf.workspace(workspace).project(project)
-            if args.version:
-                version = proj.version(args.version)
-            else:
-                version = proj.version(proj.version())  # latest version
+            # Latest version comes from the project cache unless --refresh
+            info, proj = _get_project(api_key, workspace, project, refresh=args.refresh)
+            version_num = args.version or info["version"]
+            if not version_num:
+                print(f"No dataset versions found for project: {project}")
+                sys.exit(1)
+            if proj is None:
+                from roboflow import Roboflow
+                proj = Roboflow(api_key=api_key).workspace(workspace).project(project)
+            version = proj.version(version_num)
             print(f"Downloading dataset version {version.version} in format '{args.format}'...")
             dataset_dir = version.download(args.format, location=args.output_dir)
             print(f"Dataset downloaded to: {dataset_dir}")
@@ -279,10 +712,6 @@ def main():
     elif args.command == "infer":
         try:
             from inference import get_model
-            import json
-            import glob
-            from pathlib import Path
-            import os
 
             model_id = args.model_id
             if not model_id:
@@ -290,40 +719,55 @@ def main():
                 if not project or not config.get("project") or not config.get("project"):
                     print("You must provide --model-id or have project/version in config.")
                     sys.exit(1)
-                # Use latest version if not specified
-                rf = Roboflow(api_key=api_key)
-                proj = rf.workspace(workspace).project(project)
-                version_num = proj.version()  # latest
-                model_id = f"{project}/{version_num}"
+                # Use latest version if not specified (cached unless --refresh)
+                info, _ = _get_project(api_key, workspace, project, refresh=args.refresh)
+                if not info["version"]:
+                    print(f"No trained versions found for project: {project}")
+                    sys.exit(1)
+                model_id = f"{project}/{info['version']}"
 
             model = get_model(model_id=model_id, api_key=api_key)
-            Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+            os.makedirs(args.output_dir, exist_ok=True)
+            # Built once; per-image output paths are plain string joins
+            out_prefix = os.path.join(args.output_dir, "")
+
+            def save_results(img_path, results):
+                out_path = out_prefix + os.path.splitext(os.path.basename(img_path))[0] + "_predictions.json"
+                _write_json(out_path, results)
+                print(f"Inference results saved to {out_path}")
 
             def run_and_save(img_path):
                 results = model.infer(img_path, confidence=args.confidence)
-                out_path = Path(args.output_dir) / (Path(img_path).stem + "_predictions.json")
-                with open(out_path, "w") as f:
-                    json.dump(results, f, indent=2)
-                print(f"Inference results saved to {out_path}")
+                save_results(img_path, results)
                 return results
 
+            def run_and_save_batch(batch):
+                # Fall back to the path if an image could not be pre-decoded
+                inputs = [img_path if image is None else image for img_path, image in batch]
+                results_list = model.infer(inputs, confidence=args.confidence)
+                for (img_path, _), results in zip(batch, results_list):
+                    # Same one-element list a single-image infer call returns
+                    save_results(img_path, [results])
+
             if args.image:
                 if not os.path.exists(args.image):
                     print(f"Image file not found: {args.image}")
                     sys.exit(1)
                 run_and_save(args.image)
             elif args.directory:
-                exts = [".jpg", ".jpeg", ".png", ".bmp", ".tiff"]
-                images = []
-                for ext in exts:
-                    images.extend(glob.glob(str(Path(args.directory) / f"*{ext}")))
-                    images.extend(glob.glob(str(Path(args.directory) / f"*{ext.upper()}")))
+                images = find_image_files(args.directory)
                 if not images:
                     print(f"No images found in {args.directory}")
                     sys.exit(1)
                 print(f"Found {len(images)} images. Running inference...")
-                for img_path in images:
-                    run_and_save(img_path)
+                batch = []
+                for item in _prefetch_images(images):
+                    batch.append(item)
+                    if len(batch) == args.batch_size:
+                        run_and_save_batch(batch)
+                        batch = []
+                if batch:
+                    run_and_save_batch(batch)
                 print("Batch inference complete.")
             else:
                 print("Please specify either --image or --directory for inference.")
@@ -362,52 +806,19 @@ def main():
     elif args.command == "sync-all":
         try:
             from sharepoint_sync import SharePointSync
-            # Import RoboflowUploader from this file
-            RoboflowUploader = globals().get('RoboflowUploader')
-            if RoboflowUploader is None:
-                # If not in globals, define a fallback import (for future refactor)
-                from roboflow import Roboflow
-                class RoboflowUploader:
-                    def __init__(self, api_key, project_name, workspace_name):
-                        self.api_key = api_key
-                        self.project_name = project_name
-                        self.workspace_name = workspace_name
-                        self.rf = Roboflow(api_key=api_key)
-                        self.project = self.rf.workspace(workspace_name).project(project_name)
-                    def upload_batch_photos(self, image_dir, split, file_extensions=None):
-                        if file_extensions is None:
-                            file_extensions = ['.jpg', '.jpeg', '.png', '.bmp', '.tiff']
-                        from pathlib import Path
-                        import os
-                        image_files = []
-                        for ext in file_extensions:
-                            image_files.extend(Path(image_dir).glob(f"*{ext}"))
-                            image_files.extend(Path(image_dir).glob(f"*{ext.upper()}"))
-                        success_count = 0
-                        failed_count = 0
-                        for image_file in image_files:
-                            try:
-                                self.project.upload(
-                                    image_path=str(image_file),
-                                    num_retry_uploads=3,
-                                    split=split
-                                )
-                                success_count += 1
-                            except Exception:
-                                failed_count += 1
-                        return {"success": success_count, "failed": failed_count, "total": len(image_files)}
             # Validate required arguments
             for arg in [args.local_root, args.sharepoint_site, args.sharepoint_folder, args.project, args.workspace, args.api_key]:
                 if not arg:
                     print("--local-root, --sharepoint-site, --sharepoint-folder, --project, --workspace, and --api-key are required.")
                     sys.exit(1)
             splits = ["train", "valid", "test"]
-            summary = {}
-            for split in splits:
+            # One uploader for all splits so Roboflow auth happens once
+            uploader = _get_uploader(args.api_key, args.project, args.workspace, args.rpm, args.workers)
+            def _process_split(split):
                 local_split = os.path.join(args.local_root, split)
                 sp_split = f"{args.sharepoint_folder}/{split}"
                 # Ensure local split folder exists
-                Path(local_split).mkdir(parents=True, exist_ok=True)
+                os.makedirs(local_split, exist_ok=True)
                 # Sync local <-> SharePoint for this split
                 print(f"\nSyncing {split} folder between local and SharePoint...")
                 sp_sync = SharePointSync(
@@ -424,9 +835,11 @@ def main():
                 sp_sync.sync()
                 # Upload local images to Roboflow for this split
                 print(f"Uploading local {split} images to Roboflow...")
-                uploader = RoboflowUploader(args.api_key, args.project, args.workspace)
-                stats = uploader.upload_batch_photos(local_split, split)
-                summary[split] = stats
+                return uploader.upload_batch_photos(local_split, split)
+            # Splits are independent and I/O-bound, so process them concurrently
+            with ThreadPoolExecutor(max_workers=len(splits)) as executor:
+                futures = {split: executor.submit(_process_split, split) for split in splits}
+                summary = {split: future.result() for split, future in futures.items()}
             print("\nSync Summary:")
             for split, stats in summary.items():
                 print(f"  {split}: {stats['success']} uploaded, {stats['failed']} failed, {stats['total']} total")
@@ -7,14 +7,47 @@ Handles authentication and bi-directional sync between a local folder and a Shar
 from office365.sharepoint.client_context import ClientContext
 from office365.runtime.auth.user_credential import UserCredential
 from office365.runtime.auth.client_credential import ClientCredential
-from office365.sharepoint.files.file import File
-from datetime import datetime
+from office365.runtime.queries.service_operation import ServiceOperationQuery
+from office365.runtime.retry import retry_after_delay
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+import hashlib
+import json
 import os
+import tempfile
 from pathlib import Path
 import logging
+import threading
+import uuid
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+UPLOAD_CHUNK_SIZE = 10 * 1024 * 1024  # 10 MiB
+UPLOAD_CHUNK_ATTEMPTS = 4  # first try + 3 retries per chunk
+PART_SUFFIX = ".part"  # in-progress downloads, never uploaded
+UPLOADING_SUFFIX = ".uploading"  # in-progress chunked uploads, never downloaded
+ETAG_CACHE_FILE = ".sp_etag_cache.{}.json"  # one file per sync root (site + folder + local folder)
+
+def _parse_sp_time(s):
+    """
+    Parse SharePoint's fixed-width "YYYY-MM-DDTHH:MM:SSZ" timestamps.
+    Slicing is much cheaper than strptime on large folder listings.
+    """
+    return datetime(int(s[0:4]), int(s[5:7]), int(s[8:10]), int(s[11:13]), int(s[14:16]), int(s[17:19]))
+
+def _sp_time_ns(sp_time):
+    """
+    Convert a parsed SharePoint (UTC) timestamp to integer epoch nanoseconds,
+    the same unit as st_mtime_ns, without a float round-trip.
+    """
+    return int(sp_time.replace(tzinfo=timezone.utc).timestamp()) * 1_000_000_000
+
+MTIME_TOLERANCE_NS = 1_000_000_000  # 1 second
 
 class SharePointSync:
-    def __init__(self, site_url, sharepoint_folder, local_folder, direction="both", client_id=None, client_secret=None, username=None, password=None):
+    def __init__(self, site_url, sharepoint_folder, local_folder, direction="both", client_id=None, client_secret=None, username=None, password=None, max_workers=6):
         """
         Initialize SharePointSync.
         Args:
@@ -26,6 +59,7 @@ class SharePointSync:
             client_secret: Azure AD App client secret (optional)
             username: SharePoint username (optional)
             password: SharePoint password (optional)
+            max_workers: Number of files transferred in parallel (default: 6)
         """
         self.site_url = site_url
         self.sharepoint_folder = sharepoint_folder
@@ -35,7 +69,14 @@ class SharePointSync:
         self.client_secret = client_secret
         self.username = username
         self.password = password
+        self.max_workers = max_workers
         self.ctx = None
+        self._local = threading.local()
+        self._etags = {}
+        root_key = hashlib.sha1(f"{site_url}|{sharepoint_folder}|{os.path.abspath(local_folder)}".encode("utf-8")).hexdigest()[:16]
+        self._etag_cache_file = ETAG_CACHE_FILE.format(root_key)
+        self._session = None
+        self._session_lock = threading.Lock()
         logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
         self.logger = logging.getLogger("SharePointSync")
 
@@ -49,8 +90,7 @@ class SharePointSync:
         if self.client_id and self.client_secret:
             # Azure AD App-Only authentication
             try:
-                creds = ClientCredential(self.client_id, self.client_secret)
-                self.ctx = ClientContext(self.site_url).with_credentials(creds)
+                self.ctx = self._new_context()
                 self.ctx.web.get().execute_query()
                 return self.ctx
             except Exception as e:
@@ -58,8 +98,7 @@ class SharePointSync:
         elif self.username and self.password:
             # Username/password authentication
             try:
-                creds = UserCredential(self.username, self.password)
-                self.ctx = ClientContext(self.site_url).with_credentials(creds)
+                self.ctx = self._new_context()
                 self.ctx.web.get().execute_query()
                 return self.ctx
             except Exception as e:
@@ -67,6 +106,42 @@ class SharePointSync:
         else:
             raise Exception("No valid SharePoint credentials provided. Provide either client_id/client_secret or username/password.")
 
+    def _new_context(self):
+        """
+        Build a ClientContext from the configured credentials.
+        """
+        if self.client_id and self.client_secret:
+            creds = ClientCredential(self.client_id, self.client_secret)
+        else:
+            creds = UserCredential(self.username, self.password)
+        return ClientContext(self.site_url).with_credentials(creds).with_transport(session=self._http_session())
+
+    def _http_session(self):
+        """
+        Return the requests.Session shared by every context, so HTTPS
+        connections are kept alive and reused across requests and threads.
+        """
+        with self._session_lock:
+            if self._session is None:
+                session = requests.Session()
+                # Retry only covers idempotent methods by default, so uploads are not replayed
+                adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16,
+                                      max_retries=Retry(total=3, backoff_factor=0.5,
+                                                        status_forcelist=[429, 500, 502, 503, 504]))
+                session.mount("https://", adapter)
+                self._session = session
+            return self._session
+
+    def _thread_ctx(self):
+        """
+        Return a ClientContext private to the calling thread. ClientContext
+        queues requests internally, so transfer workers must not share one.
+        """
+        ctx = getattr(self._local, "ctx", None)
+        if ctx is None:
+            ctx = self._local.ctx = self._new_context()
+        return ctx
+
     def sync(self):
         """
         Perform sync between local and SharePoint folders.
@@ -88,76 +163,239 @@ class SharePointSync:
             self._sync_local_to_sharepoint(local_root, sharepoint_root)
         self.logger.info("Sync complete.")
 
+    def _run_transfers(self, worker, items):
+        """
+        Run worker over the collected transfer items on a thread pool,
+        logging failures per item so one bad file does not stop the rest.
+        """
+        if not items:
+            return
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(worker, item): item for item in items}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    self.logger.error(f"Transfer failed for {futures[future][0]}: {e}")
+
     def _sync_sharepoint_to_local(self, sp_folder_url, local_folder):
         """
-        Recursively download new/changed files from SharePoint to local folder.
+        Download new/changed files from SharePoint to local folder. The whole
+        tree is listed first, then files are downloaded in parallel.
+        """
+        self._etags = self._load_etag_cache()
+        items = []
+        self._list_sharepoint_downloads(sp_folder_url, local_folder, items)
+        self._run_transfers(self._download_one, items)
+        self._save_etag_cache()
+
+    def _load_etag_cache(self):
+        """
+        Load the {server_relative_url: etag} map from this sync root's cache file.
+        """
+        try:
+            with open(self._etag_cache_file, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable ETag cache {self._etag_cache_file}: {e}")
+            return {}
+
+    def _save_etag_cache(self):
+        """
+        Write the ETag map back to this sync root's cache file. The temp file
+        gets a unique name, so concurrent syncs never write the same one.
         """
+        cache_dir = os.path.dirname(os.path.abspath(self._etag_cache_file))
+        tmp_file = None
         try:
+            fd, tmp_file = tempfile.mkstemp(prefix=".sp_etag_cache.", suffix=".tmp", dir=cache_dir)
+            with os.fdopen(fd, "w") as f:
+                json.dump(self._etags, f)
+            os.replace(tmp_file, self._etag_cache_file)
+        except OSError as e:
+            self.logger.warning(f"Could not save ETag cache {self._etag_cache_file}: {e}")
+            if tmp_file is not None:
+                try:
+                    os.unlink(tmp_file)
+                except OSError:
+                    pass
+
+    def _list_sharepoint_downloads(self, sp_folder_url, local_folder, items):
+        """
+        Recursively collect (server_relative_url, local_file, sp_ns, etag) for
+        files that are missing or out of date locally.
+        """
+        try:
+            local_folder.mkdir(parents=True, exist_ok=True)
             folder = self.ctx.web.get_folder_by_server_relative_url(sp_folder_url)
             files = folder.files
-            self.ctx.load(files)
+            folders = folder.folders
+            # Fetch files and subfolders in one round-trip
+            self.ctx.load(files, ["Name", "ServerRelativeUrl", "TimeLastModified", "ETag"])
+            self.ctx.load(folders)
             self.ctx.execute_query()
             for file in files:
+                if file.properties['Name'].endswith(UPLOADING_SUFFIX):
+                    continue
                 local_file = local_folder / file.properties['Name']
-                sp_time = datetime.strptime(file.properties['TimeLastModified'], "%Y-%m-%dT%H:%M:%SZ")
+                sp_url = file.properties['ServerRelativeUrl']
+                etag = file.properties.get('ETag')
+                sp_ns = _sp_time_ns(_parse_sp_time(file.properties['TimeLastModified']))
                 if local_file.exists():
-                    local_time = datetime.fromtimestamp(local_file.stat().st_mtime)
-                    if abs((local_time - sp_time).total_seconds()) < 2:
+                    # An unchanged ETag means the content is the same, whatever the mtimes say
+                    if etag and self._etags.get(sp_url) == etag:
                         self.logger.info(f"Up-to-date: {local_file}")
                         continue
-                self.logger.info(f"Downloading: {file.properties['ServerRelativeUrl']} -> {local_file}")
-                response = File.open_binary(self.ctx, file.properties['ServerRelativeUrl'])
-                with open(local_file, "wb") as f:
-                    f.write(response.content)
-                os.utime(local_file, (sp_time.timestamp(), sp_time.timestamp()))
+                    if abs(local_file.stat().st_mtime_ns - sp_ns) < MTIME_TOLERANCE_NS:
+                        self.logger.info(f"Up-to-date: {local_file}")
+                        if etag:
+                            self._etags[sp_url] = etag
+                        continue
+                items.append((sp_url, local_file, sp_ns, etag))
             # Recurse into subfolders
-            folders = folder.folders
-            self.ctx.load(folders)
-            self.ctx.execute_query()
             for subfolder in folders:
                 if subfolder.properties['Name'] in ("Forms",):
                     continue
-                self._sync_sharepoint_to_local(subfolder.properties['ServerRelativeUrl'], local_folder / subfolder.properties['Name'])
+                self._list_sharepoint_downloads(subfolder.properties['ServerRelativeUrl'], local_folder / subfolder.properties['Name'], items)
         except Exception as e:
             self.logger.error(f"Error syncing SharePoint to local: {e}")
 
+    def _download_one(self, item):
+        """
+        Download a single SharePoint file and stamp it with its SharePoint mtime.
+        """
+        sp_url, local_file, sp_ns, etag = item
+        ctx = self._thread_ctx()
+        self.logger.info(f"Downloading: {sp_url} -> {local_file}")
+        # Stream to a temporary file so memory stays at one chunk and
+        # an interrupted download never looks like a finished one
+        part_file = local_file.with_name(local_file.name + PART_SUFFIX)
+        try:
+            with open(part_file, "wb") as f:
+                sp_file = ctx.web.get_file_by_server_relative_url(sp_url)
+                sp_file.download_session(f, chunk_size=DOWNLOAD_CHUNK_SIZE).execute_query()
+        except BaseException:
+            # Don't leave partial data behind for the upload pass to pick up
+            part_file.unlink(missing_ok=True)
+            raise
+        os.replace(part_file, local_file)
+        os.utime(local_file, ns=(sp_ns, sp_ns))
+        if etag:
+            self._etags[sp_url] = etag
+
     def _sync_local_to_sharepoint(self, local_folder, sp_folder_url):
         """
-        Recursively upload new/changed files from local folder to SharePoint.
+        Upload new/changed files from local folder to SharePoint. Folders are
+        created while listing; files are then uploaded in parallel.
+        """
+        items = []
+        self._list_local_uploads(local_folder, sp_folder_url, items)
+        self._run_transfers(self._upload_one, items)
+
+    def _list_local_uploads(self, local_folder, sp_folder_url, items):
+        """
+        Recursively collect (local_path, sp_folder_url) for files that are
+        missing or older on SharePoint, creating missing folders on the way.
         """
         try:
             folder = self.ctx.web.get_folder_by_server_relative_url(sp_folder_url)
+            # Get SharePoint files and folders in one round-trip
             self.ctx.load(folder)
-            self.ctx.execute_query()
-            # Get SharePoint files and folders
-            sp_files = {f.properties['Name']: f for f in folder.files}
             self.ctx.load(folder.files)
-            self.ctx.execute_query()
-            sp_folders = {f.properties['Name']: f for f in folder.folders}
             self.ctx.load(folder.folders)
             self.ctx.execute_query()
-            # Upload files
+            sp_files = {f.properties['Name']: f for f in folder.files}
+            sp_folders = {f.properties['Name']: f for f in folder.folders}
             for item in local_folder.iterdir():
                 if item.is_file():
+                    if item.name.endswith(PART_SUFFIX):
+                        continue
                     sp_file = sp_files.get(item.name)
-                    local_time = datetime.fromtimestamp(item.stat().st_mtime)
                     upload = False
                     if sp_file:
-                        sp_time = datetime.strptime(sp_file.properties['TimeLastModified'], "%Y-%m-%dT%H:%M:%SZ")
-                        if (local_time - sp_time).total_seconds() > 2:
+                        sp_ns = _sp_time_ns(_parse_sp_time(sp_file.properties['TimeLastModified']))
+                        if item.stat().st_mtime_ns - sp_ns > MTIME_TOLERANCE_NS:
                             upload = True
                     else:
                         upload = True
                     if upload:
-                        self.logger.info(f"Uploading: {item} -> {sp_folder_url}/{item.name}")
-                        with open(item, "rb") as f:
-                            folder.upload_file(item.name, f.read())
-                        # Set modified time (not always possible)
+                        items.append((item, sp_folder_url))
                 elif item.is_dir():
                     if item.name not in sp_folders:
                         self.logger.info(f"Creating folder in SharePoint: {sp_folder_url}/{item.name}")
                         folder.folders.add(item.name)
                         self.ctx.execute_query()
-                    self._sync_local_to_sharepoint(item, f"{sp_folder_url}/{item.name}")
+                    self._list_local_uploads(item, f"{sp_folder_url}/{item.name}", items)
         except Exception as e:
-            self.logger.error(f"Error syncing local to SharePoint: {e}") 
\ No newline at end of file
+            self.logger.error(f"Error syncing local to SharePoint: {e}")
+
+    def _upload_one(self, item):
+        """
+        Upload a single local file into its SharePoint folder.
+        """
+        local_path, sp_folder_url = item
+        ctx = self._thread_ctx()
+        folder = ctx.web.get_folder_by_server_relative_url(sp_folder_url)
+        self.logger.info(f"Uploading: {local_path} -> {sp_folder_url}/{local_path.name}")
+        file_size = local_path.stat().st_size
+        if file_size <= UPLOAD_CHUNK_SIZE:
+            # A single overwrite-add, so replaying it on a transient failure is safe
+            with open(local_path, "rb") as f:
+                folder.files.add(local_path.name, f.read(), True)
+            self._execute_with_retry(ctx, local_path.name)
+        else:
+            self._upload_in_chunks(ctx, folder, local_path, file_size)
+
+    def _upload_in_chunks(self, ctx, folder, local_path, file_size):
+        """
+        Upload a large file through an upload session (start/continue/finish).
+        Memory stays at one chunk, and each chunk is retried with backoff on
+        its own, so a transient failure doesn't restart the whole file. The
+        session writes to a temporary name that is moved over the target only
+        once the last chunk is committed, so a failed upload never leaves the
+        existing SharePoint copy blanked.
+        """
+        upload_id = str(uuid.uuid4())
+        tmp_name = f"{local_path.name}.{upload_id}{UPLOADING_SUFFIX}"
+        sp_file = folder.files.add(tmp_name, None, True)
+        self._execute_with_retry(ctx, f"{local_path.name} (create)")
+        target_url = f"{sp_file.server_relative_url.rsplit('/', 1)[0]}/{local_path.name}"
+        offset = 0
+        try:
+            with open(local_path, "rb") as f:
+                while offset < file_size:
+                    chunk = f.read(UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        raise Exception(f"{local_path} shrank during upload ({offset} of {file_size} bytes read)")
+                    if offset == 0:
+                        sp_file.start_upload(upload_id, chunk)
+                    elif offset + len(chunk) < file_size:
+                        sp_file.continue_upload(upload_id, offset, chunk)
+                    else:
+                        sp_file.finish_upload(upload_id, offset, chunk)
+                    self._execute_with_retry(ctx, f"{local_path.name} at offset {offset}")
+                    offset += len(chunk)
+            # Replace the target in one step (flags=1: overwrite if it exists)
+            ctx.add_query(ServiceOperationQuery(sp_file, "moveto", {"newurl": target_url, "flags": 1}))
+            self._execute_with_retry(ctx, f"{local_path.name} (move into place)")
+        except Exception:
+            # Best effort: drop the temporary file; the target is untouched
+            try:
+                sp_file.delete_object()
+                ctx.execute_query()
+            except Exception as e:
+                self.logger.warning(f"Could not remove temporary upload {tmp_name}: {e}")
+            raise
+
+    def _execute_with_retry(self, ctx, what):
+        """
+        Run the pending upload query, retrying transient failures (408/429/5xx and
+        connection errors) with exponential backoff, or Retry-After when given.
+        """
+        def on_failure(attempt, ex):
+            self.logger.warning(f"Upload of {what} failed (attempt {attempt}/{UPLOAD_CHUNK_ATTEMPTS}): {ex}")
+            return retry_after_delay(ex)
+        ctx.execute_query_retry(max_retry=UPLOAD_CHUNK_ATTEMPTS, timeout_secs=1, max_delay=30,
+                                failure_callback=on_failure, exceptions=(requests.RequestException,)) 
\ No newline at end of file
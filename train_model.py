@@ -6,6 +6,21 @@ Trigger model training on a Roboflow dataset using the Roboflow API.
 """
 import argparse
 import sys
+import time
+
+POLL_INITIAL = 2.0  # seconds
+POLL_MAX = 120.0
+POLL_FACTOR = 1.5
+
+def _throttle_delay(exc):
+    """Return the Retry-After delay if exc is a 429 response, else None."""
+    response = getattr(exc, "response", None)
+    if response is None or getattr(response, "status_code", None) != 429:
+        return None
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return POLL_MAX
 
 def main():
     parser = argparse.ArgumentParser(description="Train a model on a Roboflow dataset")
@@ -42,19 +57,31 @@ def main():
         # Trigger training
         train_job = version.train(**train_kwargs)
         print("Training started. Monitoring status...")
-        # Monitor status if possible
+        # Monitor status, backing off so long jobs don't hammer the API
+        interval = POLL_INITIAL
         while True:
-            status = train_job.status()
+            try:
+                status = train_job.status()
+            except Exception as e:
+                delay = _throttle_delay(e)
+                if delay is None:
+                    raise
+                print(f"Status check throttled, retrying in {delay:.0f}s")
+                time.sleep(delay)
+                continue
             print(f"Status: {status['status']}")
             if status['status'] in ("succeeded", "failed", "cancelled"):
                 print(f"Training finished with status: {status['status']}")
                 break
-            import time
-            time.sleep(10)
+            time.sleep(interval)
+            interval = min(POLL_MAX, interval * POLL_FACTOR)
         if status['status'] == "succeeded":
             print("Model training complete! You can now deploy or download your model from Roboflow.")
         else:
             print("Model training did not complete successfully.")
+    except KeyboardInterrupt:
+        print("\nStopped monitoring. The training job keeps running on Roboflow.")
+        sys.exit(130)
     except Exception as e:
         print(f"Error during training: {e}")
         sys.exit(1)
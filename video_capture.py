@@ -8,7 +8,24 @@ import argparse
 import cv2
 import os
 from pathlib import Path
+import queue
 import sys
+import threading
+
+JPEG_PARAMS = [cv2.IMWRITE_JPEG_QUALITY, 85]
+PREVIEW_HEIGHT = 720  # default preview size when --preview-scale is not given
+
+def _writer(q):
+    """Encode and write queued frames until the None sentinel arrives."""
+    while True:
+        item = q.get()
+        try:
+            if item is None:
+                return
+            filename, frame = item
+            cv2.imwrite(filename, frame, JPEG_PARAMS)
+        finally:
+            q.task_done()
 
 def main():
     parser = argparse.ArgumentParser(description="Capture video from camera and save frames to dataset folder")
@@ -17,6 +34,9 @@ def main():
     parser.add_argument("--camera", type=int, default=0, help="Camera index (default: 0)")
     parser.add_argument("--frame-interval", type=int, default=5, help="Save every Nth frame (default: 5)")
     parser.add_argument("--duration", type=int, help="Optional: duration to capture in seconds (default: unlimited)")
+    parser.add_argument("--preview-scale", type=float, help="Scale factor for the preview window (default: fit to 720p)")
+    parser.add_argument("--preview-interval", type=int, default=1, help="Refresh the preview every Nth saved frame (default: 1)")
+    parser.add_argument("--no-preview", action="store_true", help="Run headless without a preview window (stop with Ctrl+C)")
     args = parser.parse_args()
 
     split_dir = Path(args.output_folder) / args.split
@@ -27,33 +47,70 @@ def main():
         print(f"Failed to open camera {args.camera}")
         sys.exit(1)
 
-    print(f"Capturing from camera {args.camera}. Press 'q' to stop.")
+    stop_hint = "Ctrl+C" if args.no_preview else "'q'"
+    print(f"Capturing from camera {args.camera}. Press {stop_hint} to stop.")
     print(f"Saving every {args.frame_interval}th frame to {split_dir}")
+    # Write frames on a background thread so slow disks don't stall capture
+    write_queue = queue.Queue(maxsize=32)
+    writer = threading.Thread(target=_writer, args=(write_queue,), daemon=True)
+    writer.start()
     frame_count = 0
     saved_count = 0
+    preview_scale = args.preview_scale
+    preview_interval = max(1, args.preview_interval)
     start_time = cv2.getTickCount() / cv2.getTickFrequency()
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("Failed to read frame from camera.")
-            break
-        frame_count += 1
-        if frame_count % args.frame_interval == 0:
-            filename = split_dir / f"frame_{frame_count:06d}.jpg"
-            cv2.imwrite(str(filename), frame)
-            saved_count += 1
-            print(f"Saved {filename}")
-        cv2.imshow("Video Capture", frame)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            print("Capture stopped by user.")
-            break
-        if args.duration:
-            elapsed = (cv2.getTickCount() / cv2.getTickFrequency()) - start_time
-            if elapsed >= args.duration:
-                print(f"Reached duration limit: {args.duration} seconds.")
+    try:
+        while True:
+            # grab() advances without decoding; only the kept frame is decoded
+            ret = True
+            for _ in range(args.frame_interval - 1):
+                if not cap.grab():
+                    ret = False
+                    break
+            if ret:
+                ret = cap.grab()
+            if ret:
+                ret, frame = cap.retrieve()
+            if not ret:
+                print("Failed to read frame from camera.")
                 break
-    cap.release()
-    cv2.destroyAllWindows()
+            frame_count += args.frame_interval
+            filename = split_dir / f"frame_{frame_count:06d}.jpg"
+            try:
+                write_queue.put_nowait((str(filename), frame.copy()))
+                saved_count += 1
+                print(f"Saved {filename}")
+            except queue.Full:
+                print(f"Write queue full, dropped {filename}")
+            if not args.no_preview and (frame_count // args.frame_interval) % preview_interval == 0:
+                # Show a downscaled copy; the full-resolution frame is what gets saved
+                if preview_scale is None:
+                    preview_scale = min(1.0, PREVIEW_HEIGHT / frame.shape[0])
+                preview = frame
+                if preview_scale != 1.0:
+                    preview = cv2.resize(frame, None, fx=preview_scale, fy=preview_scale, interpolation=cv2.INTER_AREA)
+                cv2.imshow("Video Capture", preview)
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    print("Capture stopped by user.")
+                    break
+            if args.duration:
+                elapsed = (cv2.getTickCount() / cv2.getTickFrequency()) - start_time
+                if elapsed >= args.duration:
+                    print(f"Reached duration limit: {args.duration} seconds.")
+                    break
+    except KeyboardInterrupt:
+        print("Capture stopped by user.")
+    finally:
+        # Always flush queued frames, whatever ended the loop
+        try:
+            cap.release()
+            if not args.no_preview:
+                # Headless OpenCV builds have no GUI backend and raise here
+                cv2.destroyAllWindows()
+        finally:
+            write_queue.join()
+            write_queue.put(None)
+            writer.join()
     print(f"\nCapture complete. {saved_count} frames saved to {split_dir}.")
 
 if __name__ == "__main__":
@@ -7,6 +7,7 @@ Continuously runs a Roboflow model on a video stream from a camera, displaying a
 import argparse
 import cv2
 import sys
+import threading
 
 def main():
     parser = argparse.ArgumentParser(description="Run Roboflow model on video stream from camera (real-time inference)")
@@ -15,6 +16,7 @@ def main():
     parser.add_argument("--camera", type=int, default=0, help="Camera index (default: 0)")
     parser.add_argument("--confidence", type=float, default=0.4, help="Confidence threshold (0-1, default: 0.4)")
     parser.add_argument("--output", help="Optional: path to save annotated video")
+    parser.add_argument("--batch-size", type=int, default=4, help="Frames per model.infer call (default: 4)")
     args = parser.parse_args()
 
     try:
@@ -38,27 +40,69 @@ def main():
         height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
         writer = cv2.VideoWriter(args.output, fourcc, fps, (width, height))
 
+    # Annotators are reused across frames
+    box_annotator = sv.BoxAnnotator()
+    label_annotator = sv.LabelAnnotator()
+
+    def process_batch(frames):
+        """Infer a batch of frames, then show/write them in order. Returns False on quit."""
+        # Run inference once for the whole batch
+        results_list = model.infer(frames, confidence=args.confidence)
+        for frame, results in zip(frames, results_list):
+            detections = sv.Detections.from_inference(results)
+            # Annotate frame
+            labels = [p.class_name for p in results['predictions']] if 'predictions' in results else []
+            annotated = box_annotator.annotate(scene=frame, detections=detections)
+            annotated = label_annotator.annotate(scene=annotated, detections=detections, labels=labels)
+            # Show
+            cv2.imshow("Roboflow Inference", annotated)
+            if writer:
+                writer.write(annotated)
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                return False
+        return True
+
+    # Grab frames on a separate thread; the main loop always takes the newest one
+    latest = [None]
+    lock = threading.Lock()
+    frame_ready = threading.Event()
+    stop = threading.Event()
+
+    def grabber():
+        while not stop.is_set():
+            ret, f = cap.read()
+            with lock:
+                latest[0] = (ret, f)
+                frame_ready.set()
+            if not ret:
+                break
+
+    grab_thread = threading.Thread(target=grabber, daemon=True)
+    grab_thread.start()
+
     print("Press 'q' to quit.")
+    batch_size = max(1, args.batch_size)
+    frames = []
     while True:
-        ret, frame = cap.read()
+        frame_ready.wait()
+        with lock:
+            ret, frame = latest[0]
+            latest[0] = None
+            frame_ready.clear()
         if not ret:
             print("Failed to read frame from camera.")
+            if frames:
+                process_batch(frames)
             break
-        # Run inference
-        results = model.infer(frame, confidence=args.confidence)[0]
-        detections = sv.Detections.from_inference(results)
-        # Annotate frame
-        box_annotator = sv.BoxAnnotator()
-        label_annotator = sv.LabelAnnotator()
-        labels = [p.class_name for p in results['predictions']] if 'predictions' in results else []
-        annotated = box_annotator.annotate(scene=frame, detections=detections)
-        annotated = label_annotator.annotate(scene=annotated, detections=detections, labels=labels)
-        # Show
-        cv2.imshow("Roboflow Inference", annotated)
-        if writer:
-            writer.write(annotated)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
+        frames.append(frame)
+        if len(frames) < batch_size:
+            continue
+        keep_going = process_batch(frames)
+        frames = []
+        if not keep_going:
             break
+    stop.set()
+    grab_thread.join()
     cap.release()
     if writer:
         writer.release()